@@ -5,33 +5,60 @@ Provides a command-line interface for the advanced file organizer
 """
 
 import argparse
+import os
+import stat
 import sys
 from pathlib import Path
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich import print as rprint
 
-# Add parent directory to path to import core modules
-sys.path.append(str(Path(__file__).parent.parent))
+# Rich and the core organizer are imported lazily so that --help, --undo and
+# argument errors do not pay their import cost up front
+console = None
 
-from core.file_organizer import FileOrganizer
+def _console():
+    """Return the shared Rich console, creating it on first use"""
+    global console
+    if console is None:
+        from rich.console import Console
+        console = Console()
+    return console
 
-console = Console()
+# FileOrganizer instances keyed by config path ('' for the default config)
+_organizers = {}
+
+def _get_organizer(config: str = None):
+    """Return a FileOrganizer for the given config, importing and creating it on first use"""
+    key = config or ''
+    if key not in _organizers:
+        # Running cli/main.py directly needs the project root on sys.path;
+        # through main.py it is already there
+        project_root = str(Path(__file__).resolve().parent.parent)
+        if project_root not in sys.path:
+            sys.path.append(project_root)
+        from core.file_organizer import FileOrganizer
+        
+        _organizers[key] = FileOrganizer(config) if config else FileOrganizer()
+    return _organizers[key]
 
 def print_banner():
     """Print the application banner"""
+    # The banner is decoration only, skip it when output is piped or redirected
+    if not sys.stdout.isatty():
+        return
+    
+    from rich.panel import Panel
+    
     banner = """
     [bold blue]╔══════════════════════════════════════════════════════════════╗[/bold blue]
     [bold blue]║                    SMART FILE ORGANIZER                     ║[/bold blue]
     [bold blue]║                 Advanced Productivity Tool                   ║[/bold blue]
     [bold blue]╚══════════════════════════════════════════════════════════════╝[/bold blue]
     """
-    console.print(Panel(banner, style="bold cyan"))
+    _console().print(Panel(banner, style="bold cyan"))
 
 def print_help():
     """Print detailed help information"""
+    from rich.panel import Panel
+    
     help_text = """
     [bold]Available Modes:[/bold]
     • [green]type[/green] - Organize by file type/extension (default)
@@ -52,40 +79,61 @@ def print_help():
     • Undo last operation: [cyan]python main.py --undo[/cyan]
     """
     
-    console.print(Panel(help_text, title="[bold]Help & Examples[/bold]", style="bold yellow"))
+    _console().print(Panel(help_text, title="[bold]Help & Examples[/bold]", style="bold yellow"))
 
 def validate_path(path: str) -> Path:
     """Validate and return the folder path"""
-    folder_path = Path(path)
-    if not folder_path.exists():
+    console = _console()
+    try:
+        st = os.stat(path)
+    except OSError:
         console.print(f"[red]Error: Folder '{path}' does not exist![/red]")
         sys.exit(1)
-    if not folder_path.is_dir():
+    if not stat.S_ISDIR(st.st_mode):
         console.print(f"[red]Error: '{path}' is not a directory![/red]")
         sys.exit(1)
-    return folder_path
+    return Path(path)
 
-def display_results(results: dict, dry_run: bool = False):
+# Maximum number of moved files listed in the results table unless --verbose
+MAX_RESULT_ROWS = 200
+
+def display_results(results: dict, dry_run: bool = False, verbose: bool = False):
     """Display organization results"""
+    console = _console()
     if dry_run:
         console.print("\n[bold green]✅ Dry run completed successfully![/bold green]")
         return
     
     # Display moved files
-    if results.get("moved"):
+    moved = results.get("moved")
+    if moved:
+        from rich.table import Table
+        
         table = Table(title="[bold green]Files Organized Successfully[/bold green]")
         table.add_column("File", style="cyan")
         table.add_column("Category", style="green")
         table.add_column("Reason", style="yellow")
         
-        for item in results["moved"]:
-            table.add_row(
-                item['file'],
-                item['category'],
-                item['reason']
-            )
-        
-        console.print(table)
+        if verbose:
+            # Render the full listing incrementally
+            from rich.live import Live
+            
+            with Live(table, console=console, refresh_per_second=4):
+                for item in moved:
+                    table.add_row(item['file'], item['category'], item['reason'])
+        else:
+            for item in moved[:MAX_RESULT_ROWS]:
+                table.add_row(
+                    item['file'],
+                    item['category'],
+                    item['reason']
+                )
+            
+            omitted = len(moved) - MAX_RESULT_ROWS
+            if omitted > 0:
+                table.caption = f"... {omitted} more files omitted (see organizer.log)"
+            
+            console.print(table)
     
     # Display errors
     if results.get("errors"):
@@ -102,18 +150,43 @@ def display_results(results: dict, dry_run: bool = False):
     else:
         console.print(f"\n[bold yellow]⚠️  Organized {moved_count} files with {error_count} errors[/bold yellow]")
 
-def main():
-    """Main CLI function"""
-    parser = argparse.ArgumentParser(
-        description="Smart File Organizer - Advanced productivity tool for organizing files",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+def _sniff_command(argv: list) -> str:
+    """Classify argv cheaply so trivial invocations can skip the full parser"""
+    if not argv:
+        return "help"
+    
+    wants_undo = any(arg in ("--undo", "-u") for arg in argv)
+    has_path = any(arg in ("--path", "-p") or arg.startswith("--path=") for arg in argv)
+    if wants_undo and not has_path:
+        return "undo"
+    
+    return "full"
+
+def _build_undo_parser() -> argparse.ArgumentParser:
+    """Build a minimal parser that only understands the undo options"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--undo", "-u", action="store_true")
+    parser.add_argument("--config", "-c", type=str)
+    parser.add_argument("--verbose", "-v", action="store_true")
+    return parser
+
+def _build_parser(argv: list) -> argparse.ArgumentParser:
+    """Build the full CLI argument parser"""
+    # The examples epilog is only rendered by --help
+    epilog = None
+    if "-h" in argv or "--help" in argv:
+        epilog = """
 Examples:
   %(prog)s --path "C:\\Users\\Username\\Downloads"
   %(prog)s --path "C:\\Users\\Username\\Downloads" --dry-run
   %(prog)s --path "C:\\Users\\Username\\Downloads" --mode size --profile work
   %(prog)s --undo
         """
+    
+    parser = argparse.ArgumentParser(
+        description="Smart File Organizer - Advanced productivity tool for organizing files",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=epilog
     )
     
     parser.add_argument(
@@ -160,20 +233,50 @@ Examples:
         help="Enable verbose output"
     )
     
-    args = parser.parse_args()
+    return parser
+
+def _parse_args(argv: list):
+    """Parse CLI arguments, or return None when only help was asked for"""
+    command = _sniff_command(argv)
+    if command == "help":
+        return None
+    
+    args = None
+    if command == "undo":
+        args, extra = _build_undo_parser().parse_known_args(argv)
+        if extra:
+            # Let the full parser validate anything the undo parser doesn't know
+            args = None
+    if args is None:
+        args = _build_parser(argv).parse_args(argv)
+    
+    return args
+
+def main(args: argparse.Namespace = None):
+    """
+    Main CLI function
+    
+    Args:
+        args: Already parsed options with the attributes the CLI parser
+            defines; sys.argv is parsed when omitted
+    """
+    if args is None:
+        args = _parse_args(sys.argv[1:])
+        if args is None:
+            # Handle help
+            print_banner()
+            print_help()
+            return
+    
+    console = _console()
     
     # Print banner
     print_banner()
     
-    # Handle help
-    if len(sys.argv) == 1:
-        print_help()
-        return
-    
     # Handle undo
     if args.undo:
         try:
-            organizer = FileOrganizer(args.config) if args.config else FileOrganizer()
+            organizer = _get_organizer(args.config)
             if organizer.undo_last_operation():
                 console.print("[bold green]✅ Undo operation completed![/bold green]")
             else:
@@ -192,8 +295,7 @@ Examples:
     
     # Initialize organizer
     try:
-        config_path = args.config if args.config else None
-        organizer = FileOrganizer(config_path) if config_path else FileOrganizer()
+        organizer = _get_organizer(args.config)
         
         console.print(f"[bold]Organizing folder:[/bold] [cyan]{folder_path}[/cyan]")
         console.print(f"[bold]Mode:[/bold] [green]{args.mode}[/green]")
@@ -206,6 +308,8 @@ Examples:
         console.print("\n" + "="*60 + "\n")
         
         # Organize folder
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+        
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -229,12 +333,12 @@ Examples:
                 sys.exit(1)
         
         # Display results
-        display_results(results, args.dry_run)
+        display_results(results, args.dry_run, args.verbose)
         
         # Additional information
         if not args.dry_run:
             console.print(f"\n[dim]Log file: organizer.log[/dim]")
-            console.print(f"[dim]Operation history: operation_history.json[/dim]")
+            console.print(f"[dim]Operation history: operation_history.jsonl[/dim]")
         
     except Exception as e:
         console.print(f"\n[bold red]❌ Fatal error: {e}[/bold red]")
@@ -247,8 +351,8 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        console.print("\n[yellow]Operation cancelled by user[/yellow]")
+        _console().print("\n[yellow]Operation cancelled by user[/yellow]")
         sys.exit(0)
     except Exception as e:
-        console.print(f"\n[bold red]Unexpected error: {e}[/bold red]")
+        _console().print(f"\n[bold red]Unexpected error: {e}[/bold red]")
         sys.exit(1)
@@ -4,98 +4,201 @@ File Monitor for Smart File Organizer
 Provides real-time monitoring and auto-organization of new files
 """
 
+import os
+import stat
 import time
+import queue
+import calendar
 import threading
-from pathlib import Path
+from datetime import datetime, timedelta
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from watchdog.events import PatternMatchingEventHandler
+from watchdog.utils.patterns import match_any_paths
 import logging
 from typing import Optional, Callable
 from rich.console import Console
 
 console = Console()
 
-class FileChangeHandler(FileSystemEventHandler):
+class FileChangeHandler(PatternMatchingEventHandler):
     """Handler for file system events"""
     
+    # Seconds since last modification after which a file is considered settled
+    STABLE_AFTER_SECONDS = 2.0
+    # Number of backoff rechecks for recently modified files
+    STABILITY_CHECKS = 4
+    # Seconds a move made by the monitor itself is remembered for event filtering
+    OWN_MOVE_TTL = 60.0
+    # Hidden, temporary and partial download files that are never worth organizing
+    IGNORE_PATTERNS = ['.*', '~*', '*~', '*.tmp', '*.part', '*.crdownload', '*.download', '*.!ut']
+    
     def __init__(self, organizer, config: dict):
+        self.logger = logging.getLogger('FileMonitor')
+        ignore_patterns = self.IGNORE_PATTERNS + list(config.get('exclude_patterns') or [])
+        include_patterns = config.get('include_patterns') or None
+        
+        # Watchdog raises ValueError for a pattern that is both included and
+        # ignored (compared case-insensitively), so drop it from the includes
+        if include_patterns is not None:
+            ignored = {pattern.lower() for pattern in ignore_patterns}
+            conflicting = [pattern for pattern in include_patterns if pattern.lower() in ignored]
+            if conflicting:
+                self.logger.error(f"Ignoring include_patterns that are also excluded: {conflicting}")
+                include_patterns = [pattern for pattern in include_patterns if pattern.lower() not in ignored]
+        
+        # Watchdog filters directories and ignored patterns before dispatching
+        super().__init__(
+            patterns=include_patterns,
+            ignore_patterns=ignore_patterns,
+            ignore_directories=True
+        )
         self.organizer = organizer
         self.config = config
-        self.logger = logging.getLogger('FileMonitor')
-        self.pending_files = set()
-        self.processing_lock = threading.Lock()
+        self.pending_files = queue.Queue()
+        self.debounce_seconds = config.get('monitor_debounce', 0.2)
+        # Destinations of files this monitor moved -> time of the move. Their
+        # events must not organize the category folder they landed in.
+        self._own_moves = {}
+        self._own_moves_lock = threading.Lock()
+        # Single long-lived worker that parks on the queue while idle, run
+        # between start() and stop()
+        self.organization_thread = None
+    
+    def start(self):
+        """Start the worker that organizes queued files"""
+        if self.organization_thread is None:
+            self.organization_thread = threading.Thread(target=self._process_pending_files, daemon=True)
+            self.organization_thread.start()
+    
+    def stop(self):
+        """Stop the worker once it has handled the files already queued"""
+        if self.organization_thread is not None:
+            self.pending_files.put(None)  # sentinel
+            self.organization_thread.join()
+            self.organization_thread = None
         
     def on_created(self, event):
         """Handle file creation events"""
-        if not event.is_directory:
-            self._schedule_organization(event.src_path)
+        self._schedule_organization(event.src_path)
     
     def on_moved(self, event):
         """Handle file move events"""
-        if not event.is_directory:
-            self._schedule_organization(event.dest_path)
+        # Moves are dispatched when either end matches, so a rename to a
+        # temporary or hidden name still arrives here
+        if not match_any_paths(
+            [os.fsdecode(event.dest_path)],
+            included_patterns=self.patterns,
+            excluded_patterns=self.ignore_patterns,
+            case_sensitive=self.case_sensitive
+        ):
+            return
+        self._schedule_organization(event.dest_path)
     
     def _schedule_organization(self, file_path: str):
         """Schedule a file for organization"""
-        with self.processing_lock:
-            self.pending_files.add(file_path)
-        
-        # Start organization thread if not already running
-        if not hasattr(self, 'organization_thread') or not self.organization_thread.is_alive():
-            self.organization_thread = threading.Thread(target=self._process_pending_files, daemon=True)
-            self.organization_thread.start()
+        if self._is_own_move(file_path):
+            return
+        self.pending_files.put(file_path)
+    
+    def _remember_moves(self, results: dict):
+        """Record where an organization run moved files to"""
+        now = time.monotonic()
+        with self._own_moves_lock:
+            # Forget moves whose events never arrived, e.g. into unwatched folders
+            expired = [path for path, moved_at in self._own_moves.items() if now - moved_at > self.OWN_MOVE_TTL]
+            for path in expired:
+                del self._own_moves[path]
+            
+            for moved in results.get('moved', []):
+                self._own_moves[os.path.normcase(os.path.normpath(moved['to']))] = now
+    
+    def _is_own_move(self, file_path: str) -> bool:
+        """Check (and forget) whether an event path is a move this monitor made"""
+        with self._own_moves_lock:
+            return self._own_moves.pop(os.path.normcase(os.path.normpath(file_path)), None) is not None
     
     def _process_pending_files(self):
-        """Process all pending files for organization"""
-        while True:
-            time.sleep(2)  # Wait for file operations to complete
+        """Process pending files for organization, batching bursts of events"""
+        stopping = False
+        while not stopping:
+            file_path = self.pending_files.get()
+            if file_path is None:
+                break
+            batch = {file_path}
             
-            with self.processing_lock:
-                if not self.pending_files:
+            # Coalesce events arriving within the debounce window
+            while True:
+                try:
+                    file_path = self.pending_files.get(timeout=self.debounce_seconds)
+                except queue.Empty:
                     break
-                
-                files_to_process = list(self.pending_files)
-                self.pending_files.clear()
+                if file_path is None:
+                    # Finish this batch, then exit
+                    stopping = True
+                    break
+                batch.add(file_path)
             
-            # Process each file
-            for file_path in files_to_process:
+            # Collect the distinct parent folders of files that are ready.
+            # Events for moves made by the previous batch were queued while it
+            # ran, before its destinations were known, so filter them here too.
+            parents = set()
+            for file_path in batch:
+                if self._is_own_move(file_path):
+                    continue
                 try:
-                    self._organize_single_file(file_path)
+                    parent_dir = self._organize_single_file(file_path)
+                    if parent_dir:
+                        parents.add(parent_dir)
                 except Exception as e:
                     self.logger.error(f"Error organizing {file_path}: {e}")
+            
+            # Organize each parent directory once per batch
+            for parent_dir in parents:
+                try:
+                    self.logger.info(f"Auto-organizing: {parent_dir}")
+                    results = self.organizer.organize_folder(
+                        folder_path=parent_dir,
+                        mode=self.config.get('auto_mode', 'type'),
+                        profile=self.config.get('auto_profile', 'default'),
+                        dry_run=False
+                    )
+                    self._remember_moves(results)
+                except Exception as e:
+                    self.logger.error(f"Error in auto-organization of {parent_dir}: {e}")
     
-    def _organize_single_file(self, file_path: str):
-        """Organize a single file"""
+    def _organize_single_file(self, file_path: str) -> Optional[str]:
+        """Check that a file is fully written and return its parent directory"""
         try:
-            file_path_obj = Path(file_path)
-            
             # Wait for file to be fully written
-            if not file_path_obj.exists():
-                return
-            
-            # Check if file is still being written
-            initial_size = file_path_obj.stat().st_size
-            time.sleep(1)
-            current_size = file_path_obj.stat().st_size
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                return None
             
-            if initial_size != current_size:
-                # File is still being written, skip for now
-                return
+            # Files untouched for a while are accepted without waiting
+            if time.time() - st.st_mtime > self.STABLE_AFTER_SECONDS:
+                return os.path.dirname(file_path)
             
-            # Organize the file
-            self.logger.info(f"Auto-organizing: {file_path}")
+            # Recently modified: recheck with exponential backoff (~1.5s max)
+            snapshot = (st.st_size, st.st_mtime_ns)
+            for attempt in range(self.STABILITY_CHECKS):
+                time.sleep(0.1 * 2 ** attempt)
+                try:
+                    st = os.stat(file_path)
+                except FileNotFoundError:
+                    return None
+                
+                current = (st.st_size, st.st_mtime_ns)
+                if current == snapshot:
+                    return os.path.dirname(file_path)
+                snapshot = current
             
-            # Use the organizer to organize the parent directory
-            parent_dir = str(file_path_obj.parent)
-            self.organizer.organize_folder(
-                folder_path=parent_dir,
-                mode=self.config.get('auto_mode', 'type'),
-                profile=self.config.get('auto_profile', 'default'),
-                dry_run=False
-            )
+            # File is still being written, skip for now
+            return None
             
         except Exception as e:
-            self.logger.error(f"Error in auto-organization of {file_path}: {e}")
+            self.logger.error(f"Error checking {file_path}: {e}")
+            return None
 
 class FileMonitor:
     """File monitoring system for auto-organization"""
@@ -105,25 +208,27 @@ class FileMonitor:
         self.config = config
         self.observer = Observer()
         self.handler = FileChangeHandler(organizer, config)
-        self.monitored_paths = set()
+        self._watches = {}  # path -> ObservedWatch
         self.is_running = False
         self.logger = logging.getLogger('FileMonitor')
         
     def add_watch(self, path: str, recursive: bool = True):
         """Add a path to monitor"""
         try:
-            path_obj = Path(path)
-            if not path_obj.exists():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
                 self.logger.error(f"Path does not exist: {path}")
                 return False
             
-            if not path_obj.is_dir():
+            if not stat.S_ISDIR(st.st_mode):
                 self.logger.error(f"Path is not a directory: {path}")
                 return False
             
             # Add to observer
-            self.observer.schedule(self.handler, str(path_obj), recursive=recursive)
-            self.monitored_paths.add(str(path_obj))
+            watch_path = os.path.normpath(path)
+            watch = self.observer.schedule(self.handler, watch_path, recursive=recursive)
+            self._watches[watch_path] = watch
             
             self.logger.info(f"Added watch for: {path} (recursive: {recursive})")
             return True
@@ -135,13 +240,12 @@ class FileMonitor:
     def remove_watch(self, path: str):
         """Remove a monitored path"""
         try:
-            # Find and remove the watch
-            for watch in self.observer.emitters:
-                if watch.watch.path == path:
-                    self.observer.unschedule(watch)
-                    self.monitored_paths.discard(path)
-                    self.logger.info(f"Removed watch for: {path}")
-                    return True
+            # Find and remove the watch, keyed the same way add_watch stores it
+            watch = self._watches.pop(os.path.normpath(path), None)
+            if watch:
+                self.observer.unschedule(watch)
+                self.logger.info(f"Removed watch for: {path}")
+                return True
             
             self.logger.warning(f"Watch not found for: {path}")
             return False
@@ -156,21 +260,19 @@ class FileMonitor:
             self.logger.warning("File monitoring is already running")
             return
         
-        if not self.monitored_paths:
+        if not self._watches:
             self.logger.error("No paths to monitor. Add paths first.")
             return
         
         try:
+            self.handler.start()
             self.observer.start()
             self.is_running = True
             self.logger.info("File monitoring started")
             
-            # Start monitoring thread
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
-            
         except Exception as e:
             self.logger.error(f"Error starting file monitoring: {e}")
+            self.handler.stop()
             self.is_running = False
     
     def stop_monitoring(self):
@@ -181,44 +283,28 @@ class FileMonitor:
         try:
             self.observer.stop()
             self.observer.join()
+            # The observer queues nothing more, so the worker can drain and exit
+            self.handler.stop()
             self.is_running = False
             self.logger.info("File monitoring stopped")
             
         except Exception as e:
             self.logger.error(f"Error stopping file monitoring: {e}")
     
-    def _monitor_loop(self):
-        """Main monitoring loop"""
-        try:
-            while self.is_running:
-                time.sleep(1)
-                
-                # Check if observer is still running
-                if not self.observer.is_alive():
-                    self.logger.error("Observer thread died, restarting...")
-                    self.observer.start()
-                
-        except Exception as e:
-            self.logger.error(f"Error in monitor loop: {e}")
-            self.is_running = False
-    
     def get_status(self) -> dict:
         """Get current monitoring status"""
         return {
             'is_running': self.is_running,
-            'monitored_paths': list(self.monitored_paths),
+            'monitored_paths': list(self._watches),
             'observer_alive': self.observer.is_alive() if hasattr(self.observer, 'is_alive') else False
         }
     
     def list_watches(self) -> list:
         """List all active watches"""
-        watches = []
-        for watch in self.observer.emitters:
-            watches.append({
-                'path': watch.watch.path,
-                'recursive': watch.watch.is_recursive
-            })
-        return watches
+        return [
+            {'path': path, 'recursive': watch.is_recursive}
+            for path, watch in self._watches.items()
+        ]
 
 class ScheduledOrganizer:
     """Scheduled file organization"""
@@ -228,6 +314,7 @@ class ScheduledOrganizer:
         self.config = config
         self.scheduler_thread = None
         self.is_running = False
+        self._stop_event = threading.Event()
         self.logger = logging.getLogger('ScheduledOrganizer')
         
     def start_scheduler(self):
@@ -237,6 +324,7 @@ class ScheduledOrganizer:
             return
         
         self.is_running = True
+        self._stop_event.clear()
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
         self.logger.info("Scheduled organization started")
@@ -244,68 +332,96 @@ class ScheduledOrganizer:
     def stop_scheduler(self):
         """Stop the scheduled organization"""
         self.is_running = False
+        self._stop_event.set()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
         self.logger.info("Scheduled organization stopped")
     
     def _scheduler_loop(self):
         """Main scheduler loop"""
-        while self.is_running:
+        while not self._stop_event.is_set():
             try:
-                # Get schedule configuration
-                schedule_config = self.config.get('schedule', {})
+                now = datetime.now()
+                deadlines = self._next_deadlines(now)
                 
-                # Check daily schedule
-                if schedule_config.get('daily', False):
-                    self._check_daily_schedule()
+                if not deadlines:
+                    # Nothing enabled, re-read the configuration in an hour
+                    if self._stop_event.wait(3600):
+                        break
+                    continue
                 
-                # Check weekly schedule
-                if schedule_config.get('weekly', False):
-                    self._check_weekly_schedule()
-                
-                # Check monthly schedule
-                if schedule_config.get('monthly', False):
-                    self._check_monthly_schedule()
+                # Sleep until the earliest deadline or until stopped
+                next_run = min(deadlines.values())
+                sleep_seconds = max(1, (next_run - now).total_seconds())
+                if self._stop_event.wait(sleep_seconds):
+                    break
                 
-                # Sleep for 1 hour before next check
-                time.sleep(3600)
+                now = datetime.now()
+                for schedule_type, deadline in deadlines.items():
+                    if deadline <= now:
+                        self._run_scheduled_organization(schedule_type)
                 
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(3600)  # Continue after error
+                if self._stop_event.wait(3600):  # Continue after error
+                    break
     
-    def _check_daily_schedule(self):
-        """Check if daily organization should run"""
+    def _next_deadlines(self, now: datetime) -> dict:
+        """Get the next run time of every enabled schedule"""
         schedule_config = self.config.get('schedule', {})
+        deadlines = {}
+        
+        if schedule_config.get('daily', False):
+            deadlines['daily'] = self._next_daily(now, schedule_config)
+        
+        if schedule_config.get('weekly', False):
+            deadlines['weekly'] = self._next_weekly(now, schedule_config)
+        
+        if schedule_config.get('monthly', False):
+            deadlines['monthly'] = self._next_monthly(now, schedule_config)
+        
+        return deadlines
+    
+    def _next_daily(self, now: datetime, schedule_config: dict) -> datetime:
+        """Get the next daily organization time"""
         daily_time = schedule_config.get('daily_time', '02:00')
         
-        current_time = time.strftime('%H:%M')
-        if current_time == daily_time:
-            self._run_scheduled_organization('daily')
+        run_at = datetime.combine(now.date(), self._parse_time(daily_time))
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return run_at
     
-    def _check_weekly_schedule(self):
-        """Check if weekly organization should run"""
-        schedule_config = self.config.get('schedule', {})
+    def _next_weekly(self, now: datetime, schedule_config: dict) -> datetime:
+        """Get the next weekly organization time"""
         weekly_day = schedule_config.get('weekly_day', 'sunday')
         weekly_time = schedule_config.get('weekly_time', '03:00')
         
-        current_day = time.strftime('%A').lower()
-        current_time = time.strftime('%H:%M')
+        weekdays = [day.lower() for day in calendar.day_name]
+        days_ahead = (weekdays.index(weekly_day.lower()) - now.weekday()) % 7
         
-        if current_day == weekly_day and current_time == weekly_time:
-            self._run_scheduled_organization('weekly')
+        run_at = datetime.combine(now.date() + timedelta(days=days_ahead), self._parse_time(weekly_time))
+        if run_at <= now:
+            run_at += timedelta(days=7)
+        return run_at
     
-    def _check_monthly_schedule(self):
-        """Check if monthly organization should run"""
-        schedule_config = self.config.get('schedule', {})
-        monthly_day = schedule_config.get('monthly_day', 1)
-        monthly_time = schedule_config.get('monthly_time', '04:00')
+    def _next_monthly(self, now: datetime, schedule_config: dict) -> datetime:
+        """Get the next monthly organization time"""
+        monthly_day = int(schedule_config.get('monthly_day', 1))
+        monthly_time = self._parse_time(schedule_config.get('monthly_time', '04:00'))
         
-        current_day = int(time.strftime('%d'))
-        current_time = time.strftime('%H:%M')
-        
-        if current_day == monthly_day and current_time == monthly_time:
-            self._run_scheduled_organization('monthly')
+        year, month = now.year, now.month
+        while True:
+            # Clamp to the last day for short months
+            day = min(monthly_day, calendar.monthrange(year, month)[1])
+            run_at = datetime.combine(now.date().replace(year=year, month=month, day=day), monthly_time)
+            if run_at > now:
+                return run_at
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    
+    @staticmethod
+    def _parse_time(value: str):
+        """Parse an HH:MM schedule time"""
+        return datetime.strptime(value, '%H:%M').time()
     
     def _run_scheduled_organization(self, schedule_type: str):
         """Run scheduled organization"""
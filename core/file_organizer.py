@@ -1,20 +1,249 @@
 
 import os
+import re
+import ast
+import copy
+import errno
 import shutil
-import hashlib
 import json
+import mmap
 import logging
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import yaml
+import xxhash
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich.panel import Panel
 
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
 console = Console()
 
+# Content fingerprinting (xxh3, non-cryptographic: duplicate detection only)
+HASH_CHUNK_SIZE = 1 << 20           # 1 MiB reads
+PREFIX_HASH_SIZE = 64 << 10         # prefix compared before full hashing
+
+# Units for human readable sizes, one per power of 1024
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Per-file planning switches to a thread pool for folders at least this big
+PARALLEL_MIN_FILES = 64
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Content-mode keyword rules in priority order: (category, reason, keywords)
+CONTENT_CATEGORIES = (
+    ('Invoices', 'Contains invoice-related content', ('invoice', 'bill', 'receipt')),
+    ('Resumes', 'Contains resume-related content', ('resume', 'cv', 'curriculum')),
+    ('Sensitive', 'Contains sensitive content', ('password', 'secret', 'key')),
+)
+CONTENT_EXTENSIONS = frozenset({'.txt', '.md', '.py', '.js', '.html', '.css'})
+# Keyword (lowercase bytes) -> index into CONTENT_CATEGORIES
+CONTENT_KEYWORDS = {
+    keyword.encode(): index
+    for index, (_, _, keywords) in enumerate(CONTENT_CATEGORIES)
+    for keyword in keywords
+}
+CONTENT_PATTERN = re.compile(b'|'.join(re.escape(keyword) for keyword in CONTENT_KEYWORDS))
+
+def _build_content_automaton():
+    """Build an Aho-Corasick automaton over the content keywords, if available"""
+    if ahocorasick is None:
+        return None
+    
+    # Standard pyahocorasick builds take str keys; content is decoded as
+    # latin-1, which maps every byte to exactly one character
+    automaton = ahocorasick.Automaton()
+    for keyword, index in CONTENT_KEYWORDS.items():
+        automaton.add_word(keyword.decode('latin-1'), index)
+    automaton.make_automaton()
+    return automaton
+
+CONTENT_AUTOMATON = _build_content_automaton()
+CONTENT_FALLBACK = ('Others', 'Content analysis')
+CONTENT_SNIFF_SIZE = 1024  # bytes read per file unless content_deep is set
+CONTENT_CHUNK_SIZE = 1024 * 1024  # bytes held in memory at once while scanning
+# Bytes carried between chunks so a keyword split across them still matches
+CONTENT_OVERLAP = max(len(keyword) for keyword in CONTENT_KEYWORDS) - 1
+
+def _find_keywords(content: bytes) -> Set[int]:
+    """Return the CONTENT_CATEGORIES indexes whose keywords occur in lowercased content"""
+    if CONTENT_AUTOMATON is not None:
+        return {index for _, index in CONTENT_AUTOMATON.iter(content.decode('latin-1'))}
+    return {CONTENT_KEYWORDS[match.group(0)] for match in CONTENT_PATTERN.finditer(content)}
+
+def _sniff_file(path: str, limit: int = -1) -> Optional[Tuple[str, str]]:
+    """
+    Match up to limit bytes of a file (all of it by default) against
+    CONTENT_CATEGORIES, returning the highest-priority (category, reason)
+    
+    Reads in CONTENT_CHUNK_SIZE pieces so large files never sit in memory
+    whole. Lives at module level so process pool workers can run it.
+    """
+    found = set()
+    remaining = limit
+    tail = b''
+    try:
+        with open(path, 'rb') as f:
+            while remaining:
+                chunk = f.read(CONTENT_CHUNK_SIZE if remaining < 0 else min(remaining, CONTENT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                if remaining > 0:
+                    remaining -= len(chunk)
+                
+                content = tail + chunk.lower()
+                found |= _find_keywords(content)
+                # Nothing can outrank the first category
+                if 0 in found:
+                    break
+                tail = content[-CONTENT_OVERLAP:] if CONTENT_OVERLAP else b''
+    except OSError:
+        return None
+    
+    # The highest-priority category found wins
+    return CONTENT_CATEGORIES[min(found)][:2] if found else None
+
+# Moves between progress bar updates
+PROGRESS_BATCH_SIZE = 32
+
+# Append-only operation log, one JSON object per line
+HISTORY_FILE = 'operation_history.jsonl'
+# Whole-list JSON history written by earlier versions, imported once
+LEGACY_HISTORY_FILE = 'operation_history.json'
+
+# Names a rule condition may reference, in predicate argument order
+CONDITION_VARIABLES = ('extension', 'size', 'modified_days_ago', 'filename')
+
+class _ConditionCompiler(ast.NodeTransformer):
+    """Validate a rule condition AST and rewrite filename_contains() calls"""
+    
+    ALLOWED_NODES = (
+        ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not,
+        ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+        ast.In, ast.NotIn, ast.Constant, ast.List, ast.Tuple, ast.Load
+    )
+    
+    def generic_visit(self, node):
+        if not isinstance(node, self.ALLOWED_NODES):
+            raise ValueError(f"unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+    
+    def visit_Name(self, node):
+        if node.id not in CONDITION_VARIABLES:
+            raise ValueError(f"unknown name: {node.id}")
+        return node
+    
+    def visit_Call(self, node):
+        # filename_contains('x') becomes 'x' in filename (both lowercased)
+        if (isinstance(node.func, ast.Name) and node.func.id == 'filename_contains'
+                and len(node.args) == 1 and not node.keywords
+                and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+            return ast.Compare(
+                left=ast.Constant(node.args[0].value.lower()),
+                ops=[ast.In()],
+                comparators=[ast.Name(id='filename', ctx=ast.Load())]
+            )
+        raise ValueError("only filename_contains('...') calls are supported")
+
+def _condition_extensions(node) -> Optional[frozenset]:
+    """
+    Extensions a condition can match at all, or None if it may match any file
+    
+    Understands extension == '...' and extension in [...] comparisons,
+    combined with and/or.
+    """
+    if isinstance(node, ast.BoolOp):
+        extensions = [_condition_extensions(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            known = [ext for ext in extensions if ext is not None]
+            return frozenset.intersection(*known) if known else None
+        return None if None in extensions else frozenset().union(*extensions)
+    
+    if (isinstance(node, ast.Compare) and len(node.ops) == 1
+            and isinstance(node.left, ast.Name) and node.left.id == 'extension'):
+        op, right = node.ops[0], node.comparators[0]
+        if isinstance(op, ast.Eq) and isinstance(right, ast.Constant) and isinstance(right.value, str):
+            return frozenset((right.value,))
+        if (isinstance(op, ast.In) and isinstance(right, (ast.List, ast.Tuple))
+                and all(isinstance(elt, ast.Constant) and isinstance(elt.value, str) for elt in right.elts)):
+            return frozenset(elt.value for elt in right.elts)
+    
+    return None
+
+def _compile_condition(condition: str):
+    """
+    Compile a rule condition into (predicate, extensions)
+    
+    The predicate takes (extension, size, modified_days_ago, filename) with
+    extension and filename lowercased. extensions is the set of extensions
+    the condition can match, or None when it is not limited to any.
+    """
+    body = _ConditionCompiler().visit(ast.parse(condition, mode='eval')).body
+    arguments = ast.arguments(
+        posonlyargs=[], args=[ast.arg(arg=name) for name in CONDITION_VARIABLES],
+        kwonlyargs=[], kw_defaults=[], defaults=[]
+    )
+    tree = ast.fix_missing_locations(ast.Expression(ast.Lambda(args=arguments, body=body)))
+    predicate = eval(compile(tree, '<rule condition>', 'eval'), {'__builtins__': {}})
+    return predicate, _condition_extensions(body)
+
+@lru_cache(maxsize=4)
+def _parse_yaml(path: str, mtime_ns: int) -> dict:
+    """Parse a YAML file once per modification; mtime_ns only keys the cache"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+def _load_yaml(path: str, mtime_ns: int) -> dict:
+    """Return a private copy of a parsed YAML file, safe for the caller to modify"""
+    return copy.deepcopy(_parse_yaml(path, mtime_ns))
+
+class _Cancelled(Exception):
+    """Raised inside organize_folder once should_cancel() returns True"""
+
+def _check_cancel(should_cancel: Optional[Callable[[], bool]]):
+    """Abort the current organization if cancellation was requested"""
+    if should_cancel is not None and should_cancel():
+        raise _Cancelled
+
+def _collect(results, should_cancel: Optional[Callable[[], bool]]) -> list:
+    """
+    List the results of an Executor.map, checking for cancellation after
+    each one; closing the iterator cancels the calls not yet started
+    """
+    collected = []
+    try:
+        for result in results:
+            collected.append(result)
+            _check_cancel(should_cancel)
+    finally:
+        results.close()
+    return collected
+
+class PlanItem:
+    """A planned move for a single file, with the stat data gathered during the scan"""
+    
+    # Slotted rather than a dict or dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('file', 'source', 'target', 'category', 'reason', 'st_size', 'st_mtime', 'duplicate_of')
+    
+    def __init__(self, file: Path, st: os.stat_result, base_path: Path, category: str, reason: str):
+        self.file = file
+        self.source = str(file)
+        self.target = str(base_path / category / file.name)
+        self.category = category
+        self.reason = reason
+        self.st_size = st.st_size
+        self.st_mtime = st.st_mtime
+        self.duplicate_of = None
+
 class FileOrganizer:
     """
     Advanced File Organizer with smart categorization, rules engine, and multiple sorting modes
@@ -23,22 +252,22 @@ class FileOrganizer:
     def __init__(self, config_path: str = "config/config.yaml"):
         self.config_path = config_path
         self.config = self._load_config()
+        self._compile_rules()
         self.logger = self._setup_logging()
-        self.operation_history = []
+        self._session_operations = []  # operations logged by this instance, for undo
         self.duplicate_hashes = {}
+        self._extension_index = {}
         
     def _load_config(self) -> dict:
         """Load configuration from YAML file"""
         try:
             if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
+                return _load_yaml(os.path.abspath(self.config_path), os.stat(self.config_path).st_mtime_ns)
             else:
                 # Load default config
                 default_config_path = "config/default_config.yaml"
                 if os.path.exists(default_config_path):
-                    with open(default_config_path, 'r', encoding='utf-8') as f:
-                        return yaml.safe_load(f)
+                    return _load_yaml(os.path.abspath(default_config_path), os.stat(default_config_path).st_mtime_ns)
                 else:
                     console.print("[red]No configuration file found![/red]")
                     return {}
@@ -46,6 +275,19 @@ class FileOrganizer:
             console.print(f"[red]Error loading config: {e}[/red]")
             return {}
     
+    def _compile_rules(self):
+        """Compile every rule condition once, at config load"""
+        for rule in self.config.get('rules', None) or []:
+            if 'condition' not in rule:
+                console.print(f"[yellow]Skipping rule '{rule.get('name')}': no condition given[/yellow]")
+                rule['_compiled'], rule['_extensions'] = None, None
+                continue
+            try:
+                rule['_compiled'], rule['_extensions'] = _compile_condition(rule['condition'])
+            except (SyntaxError, ValueError) as e:
+                console.print(f"[red]Invalid condition in rule '{rule.get('name')}': {e}[/red]")
+                rule['_compiled'], rule['_extensions'] = None, None
+    
     def _setup_logging(self) -> logging.Logger:
         """Setup logging configuration"""
         logger = logging.getLogger('FileOrganizer')
@@ -62,7 +304,9 @@ class FileOrganizer:
         return logger
     
     def organize_folder(self, folder_path: str, mode: str = "type", 
-                       profile: str = "default", dry_run: bool = False) -> Dict:
+                       profile: str = "default", dry_run: bool = False,
+                       modes: Optional[List[str]] = None,
+                       should_cancel: Optional[Callable[[], bool]] = None) -> Dict:
         """
         Organize files in the specified folder based on mode and profile
         
@@ -71,6 +315,9 @@ class FileOrganizer:
             mode: Sorting mode (type, size, date, content)
             profile: Configuration profile to use
             dry_run: Show plan without moving files
+            modes: Sorting modes to combine in priority order, in place of mode
+            should_cancel: Polled between phases and files; once it returns
+                True the remaining work is skipped and results['cancelled'] is set
             
         Returns:
             Dictionary with organization results
@@ -78,6 +325,8 @@ class FileOrganizer:
         folder_path = Path(folder_path)
         if not folder_path.exists():
             raise FileNotFoundError(f"Folder {folder_path} does not exist")
+        if modes:
+            mode = '+'.join(modes)
         
         self.logger.info(f"Starting organization of {folder_path} with mode: {mode}, profile: {profile}")
         
@@ -85,32 +334,39 @@ class FileOrganizer:
         profile_config = self.config.get('profiles', {}).get(profile, {})
         enabled_categories = profile_config.get('enabled_categories', [])
         
-        # Scan files
-        files = self._scan_files(folder_path)
-        
-        # Apply organization based on mode
-        if mode == "type":
-            plan = self._organize_by_type(files, folder_path, enabled_categories)
-        elif mode == "size":
-            plan = self._organize_by_size(files, folder_path)
-        elif mode == "date":
-            plan = self._organize_by_date(files, folder_path)
-        elif mode == "content":
-            plan = self._organize_by_content(files, folder_path)
-        else:
-            raise ValueError(f"Unknown mode: {mode}")
-        
-        # Apply custom rules
-        plan = self._apply_custom_rules(plan, profile_config.get('rules', []))
+        try:
+            # Scan files (with their stat results)
+            files = self._scan_files(folder_path)
+            now = datetime.now()
+            _check_cancel(should_cancel)
+            
+            # Apply organization based on mode
+            plan = self._organize_unified(files, folder_path, modes or [mode], enabled_categories, now,
+                                          should_cancel)
+            _check_cancel(should_cancel)
+            
+            # Apply custom rules
+            plan = self._apply_custom_rules(plan, profile_config.get('rules', []), now)
+            
+            # Route byte-identical files to the duplicates folder
+            duplicates_config = self.config.get('duplicates', {})
+            if duplicates_config.get('detect_content', False):
+                plan = self._route_content_duplicates(
+                    plan, folder_path, duplicates_config.get('folder_name', 'Duplicates'), should_cancel
+                )
+                _check_cancel(should_cancel)
+        except _Cancelled:
+            self.logger.info("Organization cancelled before any files were moved")
+            return {"moved": [], "errors": [], "duplicates": [], "cancelled": True}
         
         # Handle duplicates
         plan = self._handle_duplicates(plan)
         
         # Execute plan if not dry run
-        results = {"moved": [], "errors": [], "duplicates": []}
+        results = {"moved": [], "errors": [], "duplicates": [], "cancelled": False}
         
         if not dry_run:
-            results = self._execute_plan(plan, folder_path)
+            results = self._execute_plan(plan, folder_path, should_cancel)
             self._log_operation(folder_path, mode, profile, results)
         else:
             console.print("[yellow]DRY RUN MODE - No files will be moved[/yellow]")
@@ -118,250 +374,403 @@ class FileOrganizer:
         
         return results
     
-    def _scan_files(self, folder_path: Path) -> List[Path]:
-        """Scan folder for files, excluding system files and folders"""
-        files = []
-        for item in folder_path.iterdir():
-            if item.is_file():
+    def _scan_files(self, folder_path: Path) -> List[Tuple[Path, os.stat_result]]:
+        """Scan folder for files and their stat results, excluding system files and folders"""
+        # scandir reports the entry type from the directory listing itself and
+        # caches stat(), so each file is stat'ed at most once per run
+        with os.scandir(folder_path) as entries:
+            files = [
+                entry for entry in entries
                 # Skip hidden files and system files
-                if not item.name.startswith('.') and not item.name.startswith('~'):
-                    files.append(item)
-        return files
+                if not entry.name.startswith(('.', '~')) and entry.is_file()
+            ]
+        
+        # Stat and open files in inode order to keep disk seeks short. The
+        # inode comes with the listing on POSIX but costs a call on Windows.
+        if os.name != 'nt':
+            files.sort(key=os.DirEntry.inode)
+        
+        scanned = []
+        for entry in files:
+            try:
+                scanned.append((Path(entry.path), entry.stat()))
+            except OSError:
+                # Gone since the listing, e.g. a partial download renamed away
+                continue
+        return scanned
     
-    def _organize_by_type(self, files: List[Path], base_path: Path, 
-                          enabled_categories: List[str]) -> List[Dict]:
-        """Organize files by their type/extension"""
-        plan = []
+    def _organize_unified(self, files: List[Tuple[Path, os.stat_result]], base_path: Path,
+                          modes: List[str], enabled_categories: List[str] = (),
+                          now: Optional[datetime] = None,
+                          should_cancel: Optional[Callable[[], bool]] = None) -> List[PlanItem]:
+        """
+        Plan every file in a single pass, trying the given modes in priority order
         
-        for file in files:
-            file_ext = file.suffix.lower().lstrip('.')
-            
-            # Find matching category
-            target_category = None
-            for category_name, category_config in self.config.get('categories', {}).items():
-                if category_name in enabled_categories:
-                    if file_ext in category_config.get('extensions', []):
-                        target_category = category_config['folder_name']
-                        break
-            
-            if target_category:
-                plan.append({
-                    'file': file,
-                    'action': 'move',
-                    'source': str(file),
-                    'target': str(base_path / target_category / file.name),
-                    'category': target_category,
-                    'reason': f'File type: {file_ext}'
-                })
+        A file goes to the first mode that gives it a category other than
+        'Others'; when none does, the last mode's answer stands.
+        """
+        content_deep = self.config.get('content_deep', False)
+        classifiers = []
+        for mode in modes:
+            if mode == "type":
+                classifiers.append(partial(
+                    self._classify_by_type, ext_to_category=self._get_extension_index(enabled_categories)
+                ))
+            elif mode == "size":
+                classifiers.append(partial(
+                    self._classify_by_size, size_categories=self.config.get('size_categories', {})
+                ))
+            elif mode == "date":
+                classifiers.append(partial(
+                    self._classify_by_date, date_categories=self.config.get('date_categories', {}),
+                    now=now or datetime.now()
+                ))
+            elif mode == "content":
+                matches = self._sniff_files_deep(files, should_cancel) if content_deep else None
+                classifiers.append(partial(self._classify_by_content, matches=matches))
             else:
-                plan.append({
-                    'file': file,
-                    'action': 'move',
-                    'source': str(file),
-                    'target': str(base_path / 'Others' / file.name),
-                    'category': 'Others',
-                    'reason': 'Uncategorized file type'
-                })
+                raise ValueError(f"Unknown mode: {mode}")
         
-        return plan
+        if not classifiers:
+            raise ValueError("No sorting mode given")
+        
+        plan_file = partial(self._plan_file, base_path=base_path, classifiers=classifiers)
+        if 'content' in modes and not content_deep:
+            # Sniffing opens every text file, so overlap those reads
+            return self._map_files(plan_file, files, should_cancel)
+        return [plan_file(entry) for entry in files]
+    
+    def _plan_file(self, entry: Tuple[Path, os.stat_result], base_path: Path,
+                   classifiers: list) -> PlanItem:
+        """Plan a single file with the first classifier that places it"""
+        file, st = entry
+        for classify in classifiers:
+            target_category, reason = classify(file, st)
+            if target_category != 'Others':
+                break
+        
+        return PlanItem(file, st, base_path, target_category, reason)
+    
+    def _organize_by_type(self, files: List[Tuple[Path, os.stat_result]], base_path: Path, 
+                          enabled_categories: List[str]) -> List[PlanItem]:
+        """Organize files by their type/extension"""
+        return self._organize_unified(files, base_path, ["type"], enabled_categories)
     
-    def _organize_by_size(self, files: List[Path], base_path: Path) -> List[Dict]:
+    def _organize_by_size(self, files: List[Tuple[Path, os.stat_result]], base_path: Path) -> List[PlanItem]:
         """Organize files by size"""
-        plan = []
-        size_categories = self.config.get('size_categories', {})
-        
-        for file in files:
-            file_size = file.stat().st_size
-            
-            # Determine size category
-            target_category = 'Others'
-            for category, max_size in size_categories.items():
-                if file_size <= max_size:
-                    target_category = category
-                    break
-            
-            plan.append({
-                'file': file,
-                'action': 'move',
-                'source': str(file),
-                'target': str(base_path / target_category / file.name),
-                'category': target_category,
-                'reason': f'Size: {self._format_size(file_size)}'
-            })
-        
-        return plan
+        return self._organize_unified(files, base_path, ["size"])
     
-    def _organize_by_date(self, files: List[Path], base_path: Path) -> List[Dict]:
+    def _organize_by_date(self, files: List[Tuple[Path, os.stat_result]], base_path: Path,
+                          now: datetime) -> List[PlanItem]:
         """Organize files by modification date"""
-        plan = []
-        date_categories = self.config.get('date_categories', {})
-        now = datetime.now()
+        return self._organize_unified(files, base_path, ["date"], now=now)
+    
+    def _organize_by_content(self, files: List[Tuple[Path, os.stat_result]], base_path: Path) -> List[PlanItem]:
+        """Organize files by content analysis (basic keyword detection)"""
+        return self._organize_unified(files, base_path, ["content"])
+    
+    def _get_extension_index(self, enabled_categories: List[str]) -> Dict[str, str]:
+        """Map each extension to its category folder for the enabled categories"""
+        key = frozenset(enabled_categories)
+        if key not in self._extension_index:
+            ext_to_category = {}
+            for category_name, category_config in self.config.get('categories', {}).items():
+                if category_name in key:
+                    for ext in category_config.get('extensions', []):
+                        # First category in config order wins, as before
+                        ext_to_category.setdefault(ext, category_config['folder_name'])
+            self._extension_index[key] = ext_to_category
         
-        for file in files:
-            mtime = datetime.fromtimestamp(file.stat().st_mtime)
-            days_ago = (now - mtime).days
-            
-            # Determine date category
-            target_category = 'Old_Files'
-            for category, max_days in date_categories.items():
-                if days_ago <= max_days:
-                    target_category = category
-                    break
-            
-            plan.append({
-                'file': file,
-                'action': 'move',
-                'source': str(file),
-                'target': str(base_path / target_category / file.name),
-                'category': target_category,
-                'reason': f'Modified: {days_ago} days ago'
-            })
+        return self._extension_index[key]
+    
+    def _map_files(self, func, files: List[Tuple[Path, os.stat_result]],
+                   should_cancel: Optional[Callable[[], bool]] = None) -> list:
+        """Apply func to every file, on a thread pool for larger folders"""
+        if len(files) < PARALLEL_MIN_FILES:
+            return [func(file) for file in files]
+        
+        # Per-file work is dominated by stat/open latency, not CPU
+        with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+            return _collect(executor.map(func, files), should_cancel)
+    
+    def _classify_by_type(self, file: Path, st: os.stat_result,
+                          ext_to_category: Dict[str, str]) -> Tuple[str, str]:
+        """Categorize a single file by its extension"""
+        file_ext = file.suffix.lower().lstrip('.')
         
-        return plan
+        # Find matching category
+        target_category = ext_to_category.get(file_ext)
+        
+        if target_category:
+            return target_category, f'File type: {file_ext}'
+        return 'Others', 'Uncategorized file type'
     
-    def _organize_by_content(self, files: List[Path], base_path: Path) -> List[Dict]:
-        """Organize files by content analysis (basic keyword detection)"""
-        plan = []
+    def _classify_by_size(self, file: Path, st: os.stat_result,
+                          size_categories: Dict) -> Tuple[str, str]:
+        """Categorize a single file by its size"""
+        file_size = st.st_size
+        
+        # Determine size category
+        target_category = 'Others'
+        for category, max_size in size_categories.items():
+            if file_size <= max_size:
+                target_category = category
+                break
+        
+        return target_category, f'Size: {self._format_size(file_size)}'
+    
+    def _classify_by_date(self, file: Path, st: os.stat_result,
+                          date_categories: Dict, now: datetime) -> Tuple[str, str]:
+        """Categorize a single file by its modification date"""
+        mtime = datetime.fromtimestamp(st.st_mtime)
+        days_ago = (now - mtime).days
+        
+        # Determine date category
+        target_category = 'Old_Files'
+        for category, max_days in date_categories.items():
+            if days_ago <= max_days:
+                target_category = category
+                break
+        
+        return target_category, f'Modified: {days_ago} days ago'
+    
+    def _classify_by_content(self, file: Path, st: os.stat_result,
+                             matches: Optional[Dict] = None) -> Tuple[str, str]:
+        """Categorize a single file by keywords in its content"""
+        match = None
+        
+        # Basic content detection for text files
+        if file.suffix.lower() in CONTENT_EXTENSIONS:
+            if matches is not None:
+                match = matches.get(str(file))
+            else:
+                match = _sniff_file(str(file), CONTENT_SNIFF_SIZE)
         
-        for file in files:
-            target_category = 'Others'
-            reason = 'Content analysis'
-            
-            # Basic content detection for text files
-            if file.suffix.lower() in ['.txt', '.md', '.py', '.js', '.html', '.css']:
-                try:
-                    with open(file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read(1024).lower()  # Read first 1KB
-                        
-                        if any(keyword in content for keyword in ['invoice', 'bill', 'receipt']):
-                            target_category = 'Invoices'
-                            reason = 'Contains invoice-related content'
-                        elif any(keyword in content for keyword in ['resume', 'cv', 'curriculum']):
-                            target_category = 'Resumes'
-                            reason = 'Contains resume-related content'
-                        elif any(keyword in content for keyword in ['password', 'secret', 'key']):
-                            target_category = 'Sensitive'
-                            reason = 'Contains sensitive content'
-                except:
-                    pass
-            
-            plan.append({
-                'file': file,
-                'action': 'move',
-                'source': str(file),
-                'target': str(base_path / target_category / file.name),
-                'category': target_category,
-                'reason': reason
-            })
+        return match or CONTENT_FALLBACK
+    
+    def _sniff_files_deep(self, files: List[Tuple[Path, os.stat_result]],
+                          should_cancel: Optional[Callable[[], bool]] = None) -> Dict:
+        """Scan whole text files for content keywords, keyed by path"""
+        sniffable = [str(file) for file, _ in files if file.suffix.lower() in CONTENT_EXTENSIONS]
+        if not sniffable:
+            return {}
         
-        return plan
+        # Whole-file scans are CPU bound, so spread them over processes
+        with ProcessPoolExecutor() as executor:
+            return dict(zip(sniffable, _collect(executor.map(_sniff_file, sniffable, chunksize=16), should_cancel)))
     
-    def _apply_custom_rules(self, plan: List[Dict], enabled_rules: List[str]) -> List[Dict]:
+    def _apply_custom_rules(self, plan: List[PlanItem], enabled_rules: List[str],
+                            now: datetime) -> List[PlanItem]:
         """Apply custom rules to the organization plan"""
-        rules = self.config.get('rules', [])
+        rules = [rule for rule in self.config.get('rules', None) or [] if rule.get('name') in enabled_rules]
+        if not rules:
+            return plan
+        
+        # Rules limited to certain extensions only look at those files
+        by_extension = defaultdict(list)
+        for item in plan:
+            by_extension[item.file.suffix.lower().lstrip('.')].append(item)
         
         for rule in rules:
-            if rule['name'] in enabled_rules:
-                for item in plan:
-                    if self._evaluate_rule_condition(item, rule['condition']):
-                        item['target'] = str(Path(item['target']).parent / rule['target'] / Path(item['target']).name)
-                        item['category'] = rule['target']
-                        item['reason'] = f"Custom rule: {rule['name']}"
+            extensions = rule.get('_extensions')
+            if extensions is None:
+                candidates = plan
+            else:
+                candidates = [item for ext in extensions for item in by_extension.get(ext, ())]
+            
+            for item in candidates:
+                if self._evaluate_rule_condition(item, rule, now):
+                    target_dir, name = os.path.split(item.target)
+                    item.target = os.path.join(target_dir, rule['target'], name)
+                    item.category = rule['target']
+                    item.reason = f"Custom rule: {rule['name']}"
         
         return plan
     
-    def _evaluate_rule_condition(self, item: Dict, condition: str) -> bool:
-        """Evaluate a rule condition for a file item"""
+    def _evaluate_rule_condition(self, item: PlanItem, rule: Dict, now: datetime) -> bool:
+        """Evaluate a rule's compiled condition for a file item"""
+        predicate = rule.get('_compiled')
+        if predicate is None:
+            return False
+        
         try:
-            file = item['file']
-            file_ext = file.suffix.lower().lstrip('.')
-            file_size = file.stat().st_size
-            mtime = datetime.fromtimestamp(file.stat().st_mtime)
-            days_ago = (datetime.now() - mtime).days
-            
-            # Simple condition evaluation (in production, use a proper expression parser)
-            if 'extension ==' in condition and f"'{file_ext}'" in condition:
-                if 'size >' in condition:
-                    size_limit = int(condition.split('size >')[1].split()[0])
-                    return file_size > size_limit
-                return True
-            elif 'filename_contains' in condition:
-                keywords = [kw.strip("'") for kw in condition.split('filename_contains(')[1:]]
-                keywords = [kw.split(')')[0] for kw in keywords]
-                return any(keyword.lower() in file.name.lower() for keyword in keywords)
-            elif 'modified_days_ago >' in condition:
-                days_limit = int(condition.split('>')[1].strip())
-                return days_ago > days_limit
+            file = item.file
+            days_ago = (now - datetime.fromtimestamp(item.st_mtime)).days
             
+            return bool(predicate(file.suffix.lower().lstrip('.'), item.st_size, days_ago, file.name.lower()))
+        except Exception:
             return False
-        except:
-            return False
     
-    def _handle_duplicates(self, plan: List[Dict]) -> List[Dict]:
+    def _find_duplicates(self, files: List[Tuple[Path, int]],
+                         should_cancel: Optional[Callable[[], bool]] = None) -> Dict[int, List[Path]]:
+        """
+        Group byte-identical files, given as (path, size) pairs, by content hash
+        
+        Files are bucketed by size first, then by a hash of their first
+        PREFIX_HASH_SIZE bytes, and only prefix collisions are hashed in full.
+        """
+        by_size = defaultdict(list)
+        for file, size in files:
+            if size > 0:
+                by_size[size].append(file)
+        
+        duplicates = {}
+        for size, same_size in by_size.items():
+            if len(same_size) < 2:
+                continue
+            
+            by_prefix = defaultdict(list)
+            for file in same_size:
+                _check_cancel(should_cancel)
+                try:
+                    with open(file, 'rb') as f:
+                        by_prefix[xxhash.xxh3_64_intdigest(f.read(PREFIX_HASH_SIZE))].append(file)
+                except OSError:
+                    continue
+            
+            for prefix_digest, candidates in by_prefix.items():
+                if len(candidates) < 2:
+                    continue
+                
+                # The prefix already covered small files completely
+                if size <= PREFIX_HASH_SIZE:
+                    duplicates[prefix_digest] = candidates
+                    continue
+                
+                by_content = defaultdict(list)
+                for file in candidates:
+                    _check_cancel(should_cancel)
+                    try:
+                        by_content[self._hash_file(file)].append(file)
+                    except OSError:
+                        continue
+                
+                for digest, group in by_content.items():
+                    if len(group) >= 2:
+                        duplicates[digest] = group
+        
+        return duplicates
+    
+    def _route_content_duplicates(self, plan: List[PlanItem], base_path: Path, folder_name: str,
+                                  should_cancel: Optional[Callable[[], bool]] = None) -> List[PlanItem]:
+        """Send every copy but the first of byte-identical files to the duplicates folder"""
+        groups = self._find_duplicates([(item.file, item.st_size) for item in plan], should_cancel)
+        
+        originals = {}
+        for digest, group in groups.items():
+            self.duplicate_hashes[digest] = str(group[0])
+            for file in group[1:]:
+                originals[file] = group[0]
+        
+        for item in plan:
+            original = originals.get(item.file)
+            if original is not None:
+                item.target = str(base_path / folder_name / item.file.name)
+                item.category = folder_name
+                item.reason = f'Duplicate of {original.name}'
+                item.duplicate_of = str(original)
+        
+        return plan
+    
+    def _handle_duplicates(self, plan: List[PlanItem]) -> List[PlanItem]:
         """Handle duplicate files by renaming them"""
+        # Maps each taken name to the next counter to try for it
         seen_names = {}
         
         for item in plan:
-            target_path = Path(item['target'])
+            target_path = Path(item.target)
             original_name = target_path.name
             
             if original_name in seen_names:
                 # Generate unique name
                 name, ext = os.path.splitext(original_name)
-                counter = seen_names[original_name] + 1
+                counter = seen_names[original_name]
                 new_name = f"{name}({counter}){ext}"
                 
+                # Only loops past names that were already taken as-is
                 while new_name in seen_names:
                     counter += 1
                     new_name = f"{name}({counter}){ext}"
                 
-                item['target'] = str(target_path.parent / new_name)
-                seen_names[original_name] = counter
+                item.target = str(target_path.parent / new_name)
+                seen_names[original_name] = counter + 1
+                seen_names[new_name] = 2
             else:
-                seen_names[original_name] = 1
+                seen_names[original_name] = 2
         
         return plan
     
-    def _execute_plan(self, plan: List[Dict], base_path: Path) -> Dict:
+    def _execute_plan(self, plan: List[PlanItem], base_path: Path,
+                      should_cancel: Optional[Callable[[], bool]] = None) -> Dict:
         """Execute the organization plan"""
-        results = {"moved": [], "errors": [], "duplicates": []}
+        results = {"moved": [], "errors": [], "duplicates": [], "cancelled": False}
         
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            console=console
+            console=console,
+            refresh_per_second=4
         ) as progress:
             task = progress.add_task("Organizing files...", total=len(plan))
+            created_dirs = set()
+            pending = 0
             
-            for item in plan:
+            # Keep moves into the same folder together
+            for item in sorted(plan, key=lambda item: item.category):
+                if should_cancel is not None and should_cancel():
+                    results["cancelled"] = True
+                    self.logger.info("Organization cancelled before all files were moved")
+                    break
+                
                 try:
-                    # Create target directory
-                    target_path = Path(item['target'])
-                    target_path.parent.mkdir(parents=True, exist_ok=True)
+                    # Create target directory once per folder
+                    target_dir = Path(item.target).parent
+                    if target_dir not in created_dirs:
+                        target_dir.mkdir(parents=True, exist_ok=True)
+                        created_dirs.add(target_dir)
                     
-                    # Move file
-                    shutil.move(item['source'], item['target'])
+                    # Move file: a plain rename within the organized folder,
+                    # copying only if the target turns out to be on another device.
+                    # rename (not replace) so Windows refuses to clobber an existing target.
+                    try:
+                        os.rename(item.source, item.target)
+                    except OSError as e:
+                        if e.errno != errno.EXDEV:
+                            raise
+                        shutil.move(item.source, item.target)
                     
                     results["moved"].append({
-                        'file': item['file'].name,
-                        'from': item['source'],
-                        'to': item['target'],
-                        'category': item['category'],
-                        'reason': item['reason']
+                        'file': item.file.name,
+                        'from': item.source,
+                        'to': item.target,
+                        'category': item.category,
+                        'reason': item.reason
                     })
                     
-                    self.logger.info(f"Moved {item['file'].name} to {item['category']}")
+                    if item.duplicate_of is not None:
+                        results["duplicates"].append({
+                            'file': item.file.name,
+                            'duplicate_of': item.duplicate_of,
+                            'to': item.target
+                        })
+                    
+                    self.logger.info(f"Moved {item.file.name} to {item.category}")
                     
                 except Exception as e:
-                    error_msg = f"Error moving {item['file'].name}: {str(e)}"
+                    error_msg = f"Error moving {item.file.name}: {str(e)}"
                     results["errors"].append(error_msg)
                     self.logger.error(error_msg)
                 
-                progress.advance(task)
+                pending += 1
+                if pending == PROGRESS_BATCH_SIZE:
+                    progress.advance(task, pending)
+                    pending = 0
+            
+            progress.advance(task, pending)
         
         return results
     
-    def _display_plan(self, plan: List[Dict]):
+    def _display_plan(self, plan: List[PlanItem]):
         """Display the organization plan"""
         table = Table(title="Organization Plan")
         table.add_column("File", style="cyan")
@@ -370,9 +779,9 @@ class FileOrganizer:
         
         for item in plan:
             table.add_row(
-                Path(item['source']).name,
-                item['category'],
-                item['reason']
+                item.file.name,
+                item.category,
+                item.reason
             )
         
         console.print(table)
@@ -388,27 +797,69 @@ class FileOrganizer:
             'errors': results.get('errors', [])
         }
         
-        self.operation_history.append(operation)
+        self._session_operations.append(operation)
+        
+        if not os.path.exists(HISTORY_FILE):
+            self._import_legacy_history()
+        
+        # Append a single compact line instead of rewriting the whole history
+        with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(operation, ensure_ascii=False, separators=(',', ':')) + '\n')
+    
+    def _import_legacy_history(self):
+        """Carry operations from the old JSON history file over to the JSON Lines file"""
+        try:
+            with open(LEGACY_HISTORY_FILE, 'r', encoding='utf-8') as f:
+                operations = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not import {LEGACY_HISTORY_FILE}: {e}")
+            return
+        
+        # The old file is left in place; the new one existing marks it as imported
+        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
+            for operation in operations:
+                f.write(json.dumps(operation, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.logger.info(f"Imported {len(operations)} operations from {LEGACY_HISTORY_FILE}")
+    
+    def _hash_file(self, file_path: Path) -> int:
+        """Fingerprint the whole content of a file with xxh3"""
+        hasher = xxhash.xxh3_64()
+        with open(file_path, 'rb') as f:
+            try:
+                # Hash straight from the page cache instead of copying chunks out
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Empty files cannot be mapped, and some filesystems refuse to
+                mapped = None
+            
+            if mapped is not None:
+                with mapped, memoryview(mapped) as view:
+                    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                        mapped.madvise(mmap.MADV_SEQUENTIAL)
+                    hasher.update(view)
+            else:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    hasher.update(chunk)
         
-        # Save to file
-        with open('operation_history.json', 'w', encoding='utf-8') as f:
-            json.dump(self.operation_history, f, indent=2, ensure_ascii=False)
+        return hasher.intdigest()
     
     def _format_size(self, size_bytes: int) -> str:
         """Format file size in human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} TB"
+        # Each unit spans 10 bits, so the bit length picks the unit directly
+        index = min(max(size_bytes.bit_length() - 1, 0) // 10, len(SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (10 * index)):.1f} {SIZE_UNITS[index]}"
     
     def undo_last_operation(self) -> bool:
         """Undo the last organization operation"""
-        if not self.operation_history:
+        # Only this session's operations, and the history file is left alone
+        # until undo can actually move files back
+        if not self._session_operations:
             console.print("[red]No operations to undo[/red]")
             return False
         
-        last_op = self.operation_history.pop()
+        last_op = self._session_operations.pop()
         console.print(f"[yellow]Undoing operation from {last_op['timestamp']}[/yellow]")
         
         # Implementation for undo would go here
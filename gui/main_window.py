@@ -8,18 +8,62 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 import os
 
-# Add parent directory to path to import core modules
-sys.path.append(str(Path(__file__).parent.parent))
+# Add parent directory to path to import core modules, unless main.py
+# already put it there
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
 
 from core.file_organizer import FileOrganizer
 
+# Log line templates
+LOG_DROPPED_FOLDER = "📁 Dropped folder: {}"
+LOG_PARENT_FOLDER = "📁 Using parent directory: {}"
+LOG_MOVED_FILE = "  📄 {} → {}"
+LOG_ERROR = "  ❌ {}"
+
 class SmartFileOrganizerGUI:
     """Main GUI window for the Smart File Organizer"""
     
+    # Every instance attribute, including the widgets created in setup_*
+    __slots__ = (
+        'root', 'organizer', 'selected_folder', 'message_queue', 'cancel_event',
+        'file_count_executor', 'job_queue', 'organization_thread',
+        'last_drain', 'drain_scheduled', 'closed',
+        'folder_var', 'folder_entry', 'drop_hint', 'drag_drop_supported',
+        'mode_var', 'profile_var', 'dry_run_var', 'backup_var',
+        'organize_btn', 'stop_btn',
+        'progress_var', 'progress_bar', 'progress_label', 'log_text',
+        'status_var', 'file_count_var'
+    )
+    
+    # Custom ttk styles: style name -> configure options
+    STYLES = {
+        'Title.TLabel': {'font': ('Arial', 16, 'bold')},
+        'Header.TLabel': {'font': ('Arial', 12, 'bold')},
+        'Success.TLabel': {'foreground': 'green'},
+        'Error.TLabel': {'foreground': 'red'},
+        'Warning.TLabel': {'foreground': 'orange'},
+        'Action.TButton': {'font': ('Arial', 10, 'bold')},
+        'Primary.TButton': {'font': ('Arial', 10, 'bold')},
+    }
+    
+    # Lines kept in the log display; older ones are dropped
+    MAX_LOG_LINES = 2000
+    
+    # Minimum seconds between two passes over the message queue
+    MESSAGE_INTERVAL = 0.05
+    
+    # Root window the styles were last configured for
+    _styles_initialized = None
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Smart File Organizer - Advanced Productivity Tool")
@@ -29,30 +73,43 @@ class SmartFileOrganizerGUI:
         # Initialize organizer
         self.organizer = FileOrganizer()
         self.selected_folder = None
-        self.message_queue = queue.Queue()
+        # Appends and pops are atomic, so workers can post without a lock
+        self.message_queue = deque()
+        # Set by the Stop button, polled by the organizer between moves
+        self.cancel_event = threading.Event()
+        # Folder scans for the file count run here, one at a time, in order
+        self.file_count_executor = ThreadPoolExecutor(max_workers=1)
+        # Set once the window is closed; workers stop posting to the dead root
+        self.closed = False
+        
+        # One long-lived worker runs organization jobs as they are queued
+        self.job_queue = queue.SimpleQueue()
+        self.organization_thread = threading.Thread(target=self.organization_worker, daemon=True)
+        self.organization_thread.start()
         
         # Setup UI
         self.setup_ui()
         self.setup_styles()
         self.setup_bindings()
         
-        # Start message processing
-        self.process_messages()
+        # Start message processing: the worker wakes the UI thread with an
+        # event as it posts, and a slow poll catches any missed wakeup
+        self.last_drain = 0.0
+        self.drain_scheduled = False
+        self.root.bind("<<QueueData>>", lambda e: self.request_drain())
+        self.poll_messages()
     
     def setup_styles(self):
         """Setup custom styles for the GUI"""
-        style = ttk.Style()
+        # Styles live in the Tk interpreter, so configure them once per root
+        if SmartFileOrganizerGUI._styles_initialized is self.root:
+            return
         
-        # Configure styles
-        style.configure('Title.TLabel', font=('Arial', 16, 'bold'))
-        style.configure('Header.TLabel', font=('Arial', 12, 'bold'))
-        style.configure('Success.TLabel', foreground='green')
-        style.configure('Error.TLabel', foreground='red')
-        style.configure('Warning.TLabel', foreground='orange')
+        style = ttk.Style()
+        for name, options in self.STYLES.items():
+            style.configure(name, **options)
         
-        # Configure button styles
-        style.configure('Action.TButton', font=('Arial', 10, 'bold'))
-        style.configure('Primary.TButton', font=('Arial', 10, 'bold'))
+        SmartFileOrganizerGUI._styles_initialized = self.root
     
     def setup_ui(self):
         """Setup the main user interface"""
@@ -77,17 +134,22 @@ class SmartFileOrganizerGUI:
         # Folder selection section
         self.setup_folder_selection(main_frame)
         
-        # Options section
-        self.setup_options_section(main_frame)
-        
         # Action buttons
         self.setup_action_buttons(main_frame)
         
-        # Progress and log section
-        self.setup_progress_section(main_frame)
+        # The remaining sections are built once the window has been drawn
+        self.root.after_idle(self.setup_secondary_ui, main_frame)
+    
+    def setup_secondary_ui(self, parent):
+        """Setup the sections that are not needed for the first paint"""
+        # Options section
+        self.setup_options_section(parent)
         
         # Status bar
-        self.setup_status_bar(main_frame)
+        self.setup_status_bar(parent)
+        
+        # Progress and log section, last as the log is the heaviest widget
+        self.setup_progress_section(parent)
     
     def setup_folder_selection(self, parent):
         """Setup folder selection controls"""
@@ -121,15 +183,15 @@ class SmartFileOrganizerGUI:
         )
         self.drop_hint.grid(row=1, column=0, columnspan=3, pady=(5, 0))
         
-        # Check if drag and drop is supported
-        try:
+        # Drag and drop needs a tkdnd-enabled root (e.g. TkinterDnD.Tk);
+        # detecting it is a plain attribute check, no Tcl call
+        self.drag_drop_supported = hasattr(self.root, 'drop_target_register')
+        if self.drag_drop_supported:
             self.root.drop_target_register('DND_Files')
             self.root.dnd_bind('<<Drop>>', self.handle_drop)
-            self.drag_drop_supported = True
-        except AttributeError:
+        else:
             # Drag and drop not supported, hide the hint
             self.drop_hint.grid_remove()
-            self.drag_drop_supported = False
     
     def setup_options_section(self, parent):
         """Setup organization options"""
@@ -283,6 +345,19 @@ class SmartFileOrganizerGUI:
         """Setup event bindings"""
         # Enter key in folder entry
         self.folder_entry.bind('<Return>', lambda e: self.start_organization())
+        
+        # Release worker resources when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+    
+    def on_closing(self):
+        """Shut down background work and close the window"""
+        self.closed = True
+        # Pending counts are dropped; a count already running finds closed set
+        if sys.version_info >= (3, 9):
+            self.file_count_executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            self.file_count_executor.shutdown(wait=False)
+        self.root.destroy()
     
     def browse_folder(self):
         """Open folder browser dialog"""
@@ -302,24 +377,31 @@ class SmartFileOrganizerGUI:
                 self.folder_var.set(path)
                 self.selected_folder = path
                 self.update_file_count()
-                self.log_message(f"📁 Dropped folder: {path}")
+                self.log_message(LOG_DROPPED_FOLDER.format(path))
             else:
                 # If it's a file, get its parent directory
                 parent_dir = str(Path(path).parent)
                 self.folder_var.set(parent_dir)
                 self.selected_folder = parent_dir
                 self.update_file_count()
-                self.log_message(f"📁 Using parent directory: {parent_dir}")
+                self.log_message(LOG_PARENT_FOLDER.format(parent_dir))
     
     def update_file_count(self):
-        """Update the file count display"""
+        """Update the file count display without blocking the UI thread"""
         if self.selected_folder:
-            try:
-                folder_path = Path(self.selected_folder)
-                file_count = len([f for f in folder_path.iterdir() if f.is_file])
-                self.file_count_var.set(f"Files: {file_count}")
-            except Exception as e:
-                self.file_count_var.set("Files: Error")
+            self.file_count_executor.submit(self.count_files, self.selected_folder)
+    
+    def count_files(self, folder):
+        """Count the files in a folder on the worker and post the result"""
+        if self.closed:
+            return
+        try:
+            # DirEntry knows the entry type from the listing, no stat needed
+            with os.scandir(folder) as entries:
+                file_count = sum(1 for entry in entries if entry.is_file(follow_symlinks=False))
+            self.post_message("file_count", f"Files: {file_count}")
+        except Exception:
+            self.post_message("file_count", "Files: Error")
     
     def start_organization(self):
         """Start the file organization process"""
@@ -346,59 +428,83 @@ class SmartFileOrganizerGUI:
         self.log_message(f"🔍 Dry Run: {'Yes' if self.dry_run_var.get() else 'No'}")
         self.log_message("-" * 50)
         
-        # Start organization in separate thread
-        self.organization_thread = threading.Thread(
-            target=self.run_organization,
-            daemon=True
-        )
-        self.organization_thread.start()
+        # Hand the job to the worker thread, reading the Tk variables here
+        # on the UI thread
+        self.job_queue.put({
+            'folder_path': self.selected_folder,
+            'mode': self.mode_var.get(),
+            'profile': self.profile_var.get(),
+            'dry_run': self.dry_run_var.get()
+        })
     
-    def run_organization(self):
+    def organization_worker(self):
+        """Run queued organization jobs one after another"""
+        while True:
+            self.run_organization(self.job_queue.get())
+    
+    def run_organization(self, job):
         """Run the organization process in background thread"""
         try:
             # Update progress
-            self.message_queue.put(("progress", 10, "Scanning files..."))
+            self.post_message("progress", 10, "Scanning files...")
             
             # Run organizer
             results = self.organizer.organize_folder(
-                folder_path=self.selected_folder,
-                mode=self.mode_var.get(),
-                profile=self.profile_var.get(),
-                dry_run=self.dry_run_var.get()
+                **job,
+                should_cancel=self.cancel_event.is_set
             )
             
             # Update progress
-            self.message_queue.put(("progress", 100, "Organization completed!"))
+            self.post_message("progress", 100, "Organization completed!")
             
-            # Log results
+            # Log results, one message per block rather than per file
             if results.get("moved"):
-                self.message_queue.put(("log", f"✅ Successfully organized {len(results['moved'])} files"))
-                for item in results["moved"]:
-                    self.message_queue.put(("log", f"  📄 {item['file']} → {item['category']}"))
+                self.post_message("log", "\n".join([
+                    f"✅ Successfully organized {len(results['moved'])} files",
+                    *(LOG_MOVED_FILE.format(item['file'], item['category']) for item in results["moved"])
+                ]))
             
             if results.get("errors"):
-                self.message_queue.put(("log", f"⚠️  {len(results['errors'])} errors occurred"))
-                for error in results["errors"]:
-                    self.message_queue.put(("log", f"  ❌ {error}"))
+                self.post_message("log", "\n".join([
+                    f"⚠️  {len(results['errors'])} errors occurred",
+                    *(LOG_ERROR.format(error) for error in results["errors"])
+                ]))
+            
+            if results.get("cancelled"):
+                self.post_message("log", "⏹️ Organization stopped before all files were moved")
             
             # Final status
-            if results.get("errors"):
-                self.message_queue.put(("status", "Completed with errors"))
+            if results.get("cancelled"):
+                self.post_message("status", "Stopped")
+            elif results.get("errors"):
+                self.post_message("status", "Completed with errors")
             else:
-                self.message_queue.put(("status", "Completed successfully"))
+                self.post_message("status", "Completed successfully")
                 
         except Exception as e:
-            self.message_queue.put(("log", f"❌ Error: {str(e)}"))
-            self.message_queue.put(("status", "Failed"))
+            self.post_message("log", f"❌ Error: {str(e)}")
+            self.post_message("status", "Failed")
         finally:
+            self.cancel_event.clear()
             # Re-enable organize button and disable stop button
-            self.message_queue.put(("buttons", "enable_organize"))
+            self.post_message("buttons", "enable_organize")
+    
+    def post_message(self, *message):
+        """Queue a message for the UI thread and wake it up"""
+        if self.closed:
+            return
+        self.message_queue.append(message)
+        try:
+            self.root.event_generate("<<QueueData>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            # Window closing or main loop not running; the poll picks it up
+            pass
     
     def stop_organization(self):
         """Stop the current organization process"""
-        # This is a placeholder - in a real implementation, you'd need to
-        # implement a way to gracefully stop the organizer
-        self.log_message("⏹️ Stop requested (not implemented in this version)")
+        # The organizer finishes the file it is moving, then stops
+        self.cancel_event.set()
+        self.log_message("⏹️ Stop requested, finishing the current file...")
         self.stop_btn.config(state=tk.DISABLED)
     
     def undo_last_operation(self):
@@ -422,45 +528,86 @@ class SmartFileOrganizerGUI:
     
     def log_message(self, message):
         """Add a message to the log display"""
+        self.log_messages([message])
+    
+    def log_messages(self, messages):
+        """Add several messages to the log display with a single insert"""
+        # Only follow new output if the user hasn't scrolled up to read
+        was_at_bottom = self.log_text.yview()[1] >= 0.999
+        
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
+        self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+        
+        # Keep only the newest lines, trimmed with one delete per batch
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+        
+        if was_at_bottom:
+            self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
     
+    def request_drain(self):
+        """Process messages now, or once MESSAGE_INTERVAL has passed since the last pass"""
+        if self.drain_scheduled:
+            return
+        
+        wait = self.last_drain + self.MESSAGE_INTERVAL - time.monotonic()
+        if wait <= 0:
+            self.process_messages()
+        else:
+            self.drain_scheduled = True
+            self.root.after(int(wait * 1000) + 1, self.process_messages)
+    
     def process_messages(self):
         """Process messages from the background thread"""
+        self.drain_scheduled = False
+        self.last_drain = time.monotonic()
+        
+        # Log lines drained in this pass, inserted together at the end; for
+        # progress and status only the latest value is shown
+        log_batch = []
+        progress = status = None
         try:
-            while True:
-                try:
-                    msg_type, *args = self.message_queue.get_nowait()
-                    
-                    if msg_type == "progress":
-                        progress, description = args
-                        self.progress_var.set(progress)
-                        self.progress_label.config(text=description)
-                    
-                    elif msg_type == "log":
-                        message = args[0]
-                        self.log_message(message)
-                    
-                    elif msg_type == "status":
-                        status = args[0]
-                        self.status_var.set(status)
-                    
-                    elif msg_type == "buttons":
-                        action = args[0]
-                        if action == "enable_organize":
-                            self.organize_btn.config(state=tk.NORMAL)
-                            self.stop_btn.config(state=tk.DISABLED)
-                    
-                except queue.Empty:
-                    break
-                    
+            while self.message_queue:
+                msg_type, *args = self.message_queue.popleft()
+                
+                if msg_type == "progress":
+                    progress = args
+                
+                elif msg_type == "log":
+                    log_batch.append(args[0])
+                
+                elif msg_type == "file_count":
+                    self.file_count_var.set(args[0])
+                
+                elif msg_type == "status":
+                    status = args[0]
+                
+                elif msg_type == "buttons":
+                    action = args[0]
+                    if action == "enable_organize":
+                        self.organize_btn.config(state=tk.NORMAL)
+                        self.stop_btn.config(state=tk.DISABLED)
+                
         except Exception as e:
             print(f"Error processing messages: {e}")
         
-        # Schedule next check
-        self.root.after(100, self.process_messages)
+        if log_batch:
+            self.log_messages(log_batch)
+        
+        if progress is not None:
+            value, description = progress
+            self.progress_var.set(value)
+            self.progress_label.config(text=description)
+        
+        if status is not None:
+            self.status_var.set(status)
+    
+    def poll_messages(self):
+        """Fallback poll for messages whose wakeup event was missed"""
+        self.process_messages()
+        self.root.after(500, self.poll_messages)
 
 def main():
     """Main function to run the GUI"""
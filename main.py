@@ -4,33 +4,44 @@ Smart File Organizer - Main Entry Point
 A clean, modern file organization tool with CLI and GUI interfaces.
 """
 
+import os
 import sys
+import signal
 import argparse
+import threading
+import importlib
 from pathlib import Path
 
+# Interface entry points, imported on first use
+_entry_points = {}
+
+def _entry_point(module_name):
+    """Return the main() of an interface module, importing it only once"""
+    if module_name not in _entry_points:
+        _entry_points[module_name] = importlib.import_module(module_name).main
+    return _entry_points[module_name]
+
 def run_cli(args):
     """Run the CLI interface"""
-    from cli.main import main as cli_main
+    cli_main = _entry_point('cli.main')
     
-    # Set up sys.argv for the CLI module
-    sys.argv = [sys.argv[0]]
-    if args.path:
-        sys.argv.extend(["--path", args.path])
-    if args.mode:
-        sys.argv.extend(["--mode", args.mode])
-    if args.profile:
-        sys.argv.extend(["--profile", args.profile])
-    if args.dry_run:
-        sys.argv.append("--dry-run")
-    if args.config:
-        sys.argv.extend(["--config", args.config])
+    # Hand the CLI the options it expects instead of re-parsing sys.argv
+    cli_args = argparse.Namespace(
+        path=args.path,
+        mode=args.mode,
+        profile=args.profile,
+        dry_run=args.dry_run,
+        undo=False,
+        config=args.config,
+        verbose=False
+    )
     
-    cli_main()
+    cli_main(cli_args)
 
 def run_gui():
     """Run the GUI interface"""
     try:
-        from gui.main_window import main as gui_main
+        gui_main = _entry_point('gui.main_window')
         gui_main()
     except ImportError as e:
         print(f"Error: GUI dependencies not available: {e}")
@@ -55,15 +66,23 @@ def run_monitor(args):
         monitor.add_watch(args.path)
         monitor.start_monitoring()
         
-        # Keep running until interrupted
+        # Keep running until interrupted: Ctrl+C sets the event instead of
+        # raising, so the main thread sleeps without polling
+        stop = threading.Event()
+        previous_handler = signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        
+        # Windows only delivers the signal once a blocking wait times out
+        timeout = 1 if os.name == 'nt' else None
         try:
-            import time
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\nStopping file monitoring...")
-            monitor.stop_monitoring()
-            print("File monitoring stopped")
+            while not stop.wait(timeout):
+                pass
+        finally:
+            # A second Ctrl+C during shutdown should still force quit
+            signal.signal(signal.SIGINT, previous_handler)
+        
+        print("\nStopping file monitoring...")
+        monitor.stop_monitoring()
+        print("File monitoring stopped")
             
     except ImportError as e:
         print(f"Error: Monitor dependencies not available: {e}")
@@ -84,7 +103,7 @@ Examples:
     )
     
     # Interface selection (mutually exclusive)
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument("--cli", action="store_true", help="Command-line interface")
     group.add_argument("--gui", action="store_true", help="Graphical interface (default)")
     group.add_argument("--monitor", action="store_true", help="File monitoring mode")
@@ -108,6 +127,8 @@ Examples:
         run_gui()
     elif args.monitor:
         run_monitor(args)
+    else:
+        parser.print_help()
 
 if __name__ == "__main__":
     try:
@@ -2,124 +2,277 @@
 """
 Test script to verify Smart File Organizer installation
 Run this script to check if all dependencies and modules are working correctly
+(pass --deep to import each dependency rather than just locate it)
 """
 
+import os
 import sys
+import json
+import site
 import importlib
+import importlib.util
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
-def test_import(module_name, package_name=None):
-    """Test if a module can be imported"""
+# Project root, put ahead of site-packages once so the core imports in main()
+# resolve to the local modules however often main() runs
+_HERE = str(Path(__file__).resolve().parent)
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+PY = sys.version_info
+
+# Installed distribution names for packages imported under another name
+DIST_NAMES = {'yaml': 'pyyaml'}
+
+# Dependency probe results from the last run, reused until the interpreter
+# or its site-packages change
+CACHE_PATH = Path(__file__).with_suffix('.cache.json')
+
+# Project files checked by main(): (path, description)
+REQUIRED_FILES = (
+    ('main.py', 'Main entry point'),
+    ('requirements.txt', 'Dependencies file'),
+    ('config/default_config.yaml', 'Default configuration'),
+    ('cli/main.py', 'CLI interface'),
+    ('gui/main_window.py', 'GUI interface'),
+    ('README.md', 'Documentation'),
+)
+
+def probe_import(module_name, package_name=None, deep=False):
+    """
+    Check if a module can be imported, returning the error if not
+    
+    Only locates the module unless deep is set, in which case it is
+    actually imported and its top-level code runs.
+    """
     try:
-        if package_name:
-            module = importlib.import_module(module_name, package_name)
-        else:
-            module = importlib.import_module(module_name)
-        print(f"✅ {module_name} - OK")
-        return True
-    except ImportError as e:
-        print(f"❌ {module_name} - FAILED: {e}")
-        return False
+        # Modules that are already loaded need no trip through the finders
+        if module_name in sys.modules:
+            pass
+        elif deep:
+            importlib.import_module(module_name, package_name)
+        elif importlib.util.find_spec(module_name, package_name) is None:
+            raise ModuleNotFoundError(f"No module named '{module_name}'", name=module_name)
+        return None
     except Exception as e:
-        print(f"⚠️  {module_name} - ERROR: {e}")
-        return False
+        return e
+
+def probe_cache_key(deep):
+    """Describe the interpreter state that dependency probe results depend on"""
+    site_dirs = site.getsitepackages() if hasattr(site, 'getsitepackages') else []
+    site_dirs.append(site.getusersitepackages())
+    mtimes = {}
+    for site_dir in site_dirs:
+        try:
+            mtimes[site_dir] = os.stat(site_dir).st_mtime_ns
+        except OSError:
+            pass
+    return {
+        'executable': sys.executable,
+        'version': sys.version,
+        'site_packages': mtimes,
+        'sys_path': sys.path,
+        'deep': deep,
+    }
+
+def installed_distributions():
+    """Return the normalized names of every installed distribution"""
+    # Imported here so Python < 3.8 still reaches the version check in main()
+    from importlib.metadata import distributions
+    
+    names = set()
+    for dist in distributions():
+        name = dist.metadata['Name']
+        if name:
+            names.add(name.lower().replace('-', '_'))
+    return names
 
-def test_file_exists(file_path, description):
-    """Test if a file exists"""
-    if Path(file_path).exists():
-        print(f"✅ {description} - OK")
-        return True
+def probe_packages(packages, deep=False):
+    """
+    Probe packages and return their report rows
+    
+    Only successes are cached: packages that passed last time are trusted
+    while the interpreter, sys.path and site-packages are unchanged, and
+    failures are always probed again.
+    """
+    key = probe_cache_key(deep)
+    passed = set()
+    try:
+        with open(CACHE_PATH, encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache['key'] == key:
+            passed = set(cache['passed'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    pending = [package for package in packages if package not in passed]
+    
+    # Anything with installed distribution metadata counts as present without
+    # a finder lookup; stdlib modules and anything else still get probed
+    if pending and not deep:
+        installed = installed_distributions()
+        pending = [package for package in pending if DIST_NAMES.get(package, package) not in installed]
+    
+    # Probe concurrently so slow imports (tkinter, rich) overlap, then
+    # report in list order
+    errors = {}
+    if pending:
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            errors = dict(zip(pending, executor.map(partial(probe_import, deep=deep), pending)))
+    rows = [import_row(package, errors.get(package)) for package in packages]
+    
+    passed.update(package for package in packages if errors.get(package) is None)
+    try:
+        with open(CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'passed': sorted(passed)}, f)
+    except OSError:
+        pass
+    return rows
+
+def import_row(module_name, error):
+    """Turn the outcome of an import probe into a report row"""
+    if error is None:
+        return ("✅", module_name, "OK")
+    elif isinstance(error, ImportError):
+        return ("❌", module_name, f"FAILED: {error}")
     else:
-        print(f"❌ {description} - MISSING: {file_path}")
-        return False
+        return ("⚠️", module_name, f"ERROR: {error}")
 
-def main():
-    """Main test function"""
-    print("🔍 Testing Smart File Organizer Installation")
-    print("=" * 50)
+def check_files_exist(file_paths):
+    """Map each path to whether it exists, listing every parent folder once"""
+    by_parent = defaultdict(list)
+    for file_path in file_paths:
+        by_parent[os.path.dirname(file_path)].append(file_path)
     
-    # Test Python version
-    python_version = sys.version_info
-    if python_version.major >= 3 and python_version.minor >= 8:
-        print(f"✅ Python {python_version.major}.{python_version.minor}.{python_version.micro} - OK")
+    results = {}
+    for parent, paths in by_parent.items():
+        try:
+            with os.scandir(parent or '.') as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            # Folder can't be listed (missing or no permission): check each path
+            for file_path in paths:
+                results[file_path] = os.path.exists(file_path)
+            continue
+        
+        for file_path in paths:
+            # A miss may only differ in case on a case-insensitive filesystem
+            # (Windows, macOS), so confirm it with the filesystem itself
+            results[file_path] = os.path.basename(file_path) in names or os.path.exists(file_path)
+    
+    return results
+
+def file_row(file_path, description, exists):
+    """Turn a file existence check into a report row"""
+    if exists:
+        return ("✅", description, "OK")
     else:
-        print(f"❌ Python {python_version.major}.{python_version.minor}.{python_version.micro} - Python 3.8+ required")
-        return False
+        return ("❌", description, f"MISSING: {file_path}")
+
+def print_report(title, sections, summary):
+    """
+    Render every result in one go: a Rich table when rich is installed,
+    plain text otherwise
     
-    print("\n📦 Testing Dependencies:")
-    print("-" * 30)
+    sections is a list of (heading, rows) with rows of (icon, check, detail).
+    """
+    try:
+        from rich.console import Console
+        from rich.table import Table
+    except ImportError:
+        lines = [title, "=" * 50]
+        for heading, rows in sections:
+            lines += ["", f"{heading}:", "-" * 30]
+            lines += [f"{icon} {check} - {detail}" for icon, check, detail in rows]
+        print("\n".join(lines + [""] + summary))
+        return
     
-    # Test required packages
-    required_packages = [
-        'rich',
-        'watchdog',
-        'yaml',
-        'pathlib',
-        'tkinter',
-    ]
+    table = Table("", "Check", "Detail", title=title)
+    for heading, rows in sections:
+        table.add_row("", f"[bold]{heading}[/bold]", "")
+        for row in rows:
+            table.add_row(*row)
+        table.add_section()
     
-    all_packages_ok = True
-    for package in required_packages:
-        if not test_import(package):
-            all_packages_ok = False
+    console = Console()
+    console.print(table)
+    console.print("\n".join(summary), highlight=False)
+
+def main(deep=False):
+    """Main test function; deep imports every dependency instead of just locating it"""
+    title = "🔍 Testing Smart File Organizer Installation"
     
-    print("\n📁 Testing Project Files:")
-    print("-" * 30)
+    # Test Python version
+    version = f"Python {PY.major}.{PY.minor}.{PY.micro}"
+    if PY < (3, 8):
+        print(title)
+        print(f"❌ {version} - Python 3.8+ required")
+        return False
     
-    # Test project structure
-    required_files = [
-        ('main.py', 'Main entry point'),
-        ('requirements.txt', 'Dependencies file'),
-        ('config/default_config.yaml', 'Default configuration'),
-        ('core/file_organizer.py', 'Core organizer module'),
-        ('core/file_monitor.py', 'File monitor module'),
-        ('cli/main.py', 'CLI interface'),
-        ('gui/main_window.py', 'GUI interface'),
-        ('README.md', 'Documentation'),
-    ]
+    # Test required packages
+    required_third_party = ['rich', 'watchdog', 'yaml', 'xxhash']
+    # Guaranteed by the version gate, except tkinter which headless builds
+    # can leave out
+    required_stdlib = ['tkinter']
     
-    all_files_ok = True
-    for file_path, description in required_files:
-        if not test_file_exists(file_path, description):
-            all_files_ok = False
+    package_rows = probe_packages(required_third_party + required_stdlib, deep)
     
-    print("\n🔧 Testing Core Modules:")
-    print("-" * 30)
+    # Test project structure
+    existing = check_files_exist([file_path for file_path, _ in REQUIRED_FILES])
+    file_rows = [
+        file_row(file_path, description, existing[file_path])
+        for file_path, description in REQUIRED_FILES
+    ]
     
-    # Test core module imports
+    # Test core module imports; a missing core file shows up as a failed import
+    core_rows = []
+    # Flush stale finder caches once, e.g. right after a pip install
+    importlib.invalidate_caches()
     try:
-        sys.path.append(str(Path(__file__).parent))
         from core.file_organizer import FileOrganizer
-        print("✅ FileOrganizer class - OK")
+        core_rows.append(("✅", "FileOrganizer class", "OK"))
         
         from core.file_monitor import FileMonitor
-        print("✅ FileMonitor class - OK")
+        core_rows.append(("✅", "FileMonitor class", "OK"))
         
     except ImportError as e:
-        print(f"❌ Core modules - FAILED: {e}")
-        all_files_ok = False
+        core_rows.append(("❌", e.name or "Core modules", f"FAILED: {e}"))
     except Exception as e:
-        print(f"⚠️  Core modules - ERROR: {e}")
-        all_files_ok = False
-    
-    print("\n📊 Test Results:")
-    print("-" * 30)
-    
-    if all_packages_ok and all_files_ok:
-        print("🎉 All tests passed! Smart File Organizer is ready to use.")
-        print("\n🚀 Quick start:")
-        print("  CLI Mode: python main.py --cli --path \"C:\\Users\\Username\\Downloads\"")
-        print("  GUI Mode: python main.py --gui")
-        print("  Monitor Mode: python main.py --monitor --path \"C:\\Users\\Username\\Downloads\"")
-        return True
+        core_rows.append(("⚠️", "Core modules", f"ERROR: {e}"))
+    
+    sections = [
+        ("🐍 Python", [("✅", version, "OK")]),
+        ("📦 Dependencies", package_rows),
+        ("📁 Project Files", file_rows),
+        ("🔧 Core Modules", core_rows),
+    ]
+    success = all(icon == "✅" for _, rows in sections for icon, _, _ in rows)
+    
+    if success:
+        summary = [
+            "🎉 All tests passed! Smart File Organizer is ready to use.",
+            "",
+            "🚀 Quick start:",
+            "  CLI Mode: python main.py --cli --path \"C:\\Users\\Username\\Downloads\"",
+            "  GUI Mode: python main.py --gui",
+            "  Monitor Mode: python main.py --monitor --path \"C:\\Users\\Username\\Downloads\"",
+        ]
     else:
-        print("❌ Some tests failed. Please check the errors above.")
-        print("\n🔧 Troubleshooting:")
-        print("  1. Install dependencies: pip install -r requirements.txt")
-        print("  2. Check file paths and permissions")
-        print("  3. Ensure Python 3.8+ is installed")
-        return False
+        summary = [
+            "❌ Some tests failed. Please check the errors above.",
+            "",
+            "🔧 Troubleshooting:",
+            "  1. Install dependencies: pip install -r requirements.txt",
+            "  2. Check file paths and permissions",
+            "  3. Ensure Python 3.8+ is installed",
+        ]
+    
+    print_report(title, sections, summary)
+    return success
 
 if __name__ == "__main__":
-    success = main()
+    success = main(deep="--deep" in sys.argv[1:])
     sys.exit(0 if success else 1)